@@ -1,13 +1,25 @@
 from __future__ import annotations
 
+import asyncio
 import io
 import logging
+import math
+import os
+import shutil
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List
 
+import aioboto3
 import homeassistant.helpers.config_validation as cv
 import homeassistant.util.dt as dt_util
+import numpy as np
 import voluptuous as vol
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
 from homeassistant.components.image_processing import (
     CONF_ENTITY_ID,
     CONF_NAME,
@@ -15,9 +27,9 @@ from homeassistant.components.image_processing import (
     PLATFORM_SCHEMA,
     ImageProcessingEntity,
 )
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import split_entity_id
-from PIL import Image, ImageDraw, UnidentifiedImageError
-from homeassistant.util.pil import draw_box
+from PIL import Image, ImageDraw, ImageFont, UnidentifiedImageError
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,8 +47,20 @@ CONF_SAVE_FILE_FOLDER = "save_file_folder"
 CONF_SAVE_TIMESTAMPED_FILE = "save_timestamped_file"
 CONF_ALWAYS_SAVE_LATEST_FILE = "always_save_latest_file"
 CONF_SHOW_BOXES = "show_boxes"
+CONF_MOTION_THRESHOLD = "motion_threshold"
+CONF_LOCAL_FACE_DETECTION = "local_face_detection"
+CONF_TARGET_HEIGHT = "target_height"
+CONF_MAX_UPLOAD_EDGE = "max_upload_edge"
+CONF_TPS = "max_requests_per_second"
+CONF_EVENT_PER_MATCH = "event_per_match"
+CONF_RESULT_CACHE_TTL = "result_cache_ttl"
 DEFAULT_REGION = "us-east-1"
 DEFAULT_CONFIDENCE = 90.0  # similarity threshold default
+DEFAULT_MOTION_THRESHOLD = 0.0  # mean abs. difference of 64×64 grayscale frames, 0 is off
+DEFAULT_TARGET_HEIGHT = 720  # upload height, faces stay well above 80px
+DEFAULT_MAX_UPLOAD_EDGE = 1280
+DEFAULT_TPS = 5.0  # SearchFacesByImage default quota in most regions
+DEFAULT_RESULT_CACHE_TTL = 0  # seconds, the result cache is off by default
 
 SUPPORTED_REGIONS = [
     "us-east-1",
@@ -58,9 +82,50 @@ SUPPORTED_REGIONS = [
 
 DATETIME_FORMAT = "%Y-%m-%d_%H.%M.%S"
 
+# Fast encoder settings for saved snapshots: no Huffman optimisation pass,
+# baseline 4:2:0 JPEG and light zlib compression for PNG
+SAVE_FORMATS = {
+    "jpg": ("JPEG", {"quality": 85, "subsampling": 2, "optimize": False, "progressive": False}),
+    "png": ("PNG", {"compress_level": 1}),
+}
+
+# Same look as homeassistant.util.pil.draw_box: centred outline, label above it
+BOX_COLOR = (255, 255, 0)
+BOX_LINE_WIDTH = 3
+BOX_FONT_HEIGHT = 8
+
+# Frames are downscaled before upload, Rekognition gains nothing from larger
+# inputs; payloads below the threshold are not worth the re-encode
+UPLOAD_JPEG_QUALITY = 80
+UPLOAD_REENCODE_MIN_BYTES = 500_000
+REKOGNITION_MAX_IMAGE_BYTES = 5 * 1024 * 1024  # SearchFacesByImage limit for raw bytes
+
+# Results with matched faces are reused for frames whose perceptual hash is
+# within a few bits, "no match" results only for identical hashes: a face
+# covering a small part of the frame barely moves the hash
+RESULT_CACHE_SIZE = 64
+RESULT_CACHE_MAX_DISTANCE = 4
+
+# Idle pooled connections are kept open well past the default 10 s scan
+# interval, so consecutive frames reuse a warm TLS connection
+CONNECTION_KEEPALIVE_TIMEOUT = 60
+
+# Longest a frame may wait for a request slot before it is dropped (seconds)
+RATE_LIMIT_MAX_WAIT = 1.0
+
+# Frames waiting for inference / images waiting to be written, the oldest is
+# dropped on overflow. A single frame slot coalesces bursts: while a request
+# is in flight only the newest frame is kept for the next one.
+FRAME_QUEUE_SIZE = 1
+WRITER_QUEUE_SIZE = 16
+
 MIN_SIMILARITY = 0.0
 
 EVENT_FACE_RECOGNISED = "rekognition.face_recognised"
+EVENT_FACES_RECOGNISED = "rekognition.faces_recognised"
+
+# Keys of a match as exposed in attributes and events
+MATCH_FIELDS = ("external_image_id", "face_id", "similarity", "bounding_box")
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Validation schema
@@ -79,17 +144,26 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
         vol.Optional(CONF_SAVE_TIMESTAMPED_FILE, default=True): cv.boolean,
         vol.Optional(CONF_ALWAYS_SAVE_LATEST_FILE, default=True): cv.boolean,
         vol.Optional(CONF_SHOW_BOXES, default=False): cv.boolean,
+        vol.Optional(CONF_MOTION_THRESHOLD, default=DEFAULT_MOTION_THRESHOLD): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        vol.Optional(CONF_LOCAL_FACE_DETECTION, default=False): cv.boolean,
+        vol.Optional(CONF_TARGET_HEIGHT, default=DEFAULT_TARGET_HEIGHT): cv.positive_int,
+        vol.Optional(CONF_MAX_UPLOAD_EDGE, default=DEFAULT_MAX_UPLOAD_EDGE): cv.positive_int,
+        vol.Optional(CONF_TPS, default=DEFAULT_TPS): vol.All(
+            vol.Coerce(float), vol.Range(min=0, min_included=False)
+        ),
+        vol.Optional(CONF_EVENT_PER_MATCH, default=True): cv.boolean,
+        vol.Optional(CONF_RESULT_CACHE_TTL, default=DEFAULT_RESULT_CACHE_TTL): cv.positive_int,
     }
 )
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Setup platform
 
-def setup_platform(hass, config, add_devices, discovery_info=None):
+async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up Rekognition Face Recognition."""
 
-    import boto3  # late import so module is optional in Home Assistant core
-
     aws_config = {
         "region_name": config[CONF_REGION],
         "aws_access_key_id": config[CONF_ACCESS_KEY_ID],
@@ -97,17 +171,66 @@ def setup_platform(hass, config, add_devices, discovery_info=None):
     }
 
     _LOGGER.debug("Connecting to AWS Rekognition in %s", aws_config["region_name"])
-    rekognition_client = boto3.client("rekognition", **aws_config)
+    _install_orjson_parser()
+
+    # One session and one pooled, keep-alive client shared by every camera
+    client_config = AioConfig(
+        max_pool_connections=max(10, len(config[CONF_SOURCE]) * 2),
+        connector_args={"keepalive_timeout": CONNECTION_KEEPALIVE_TIMEOUT},
+        retries={"max_attempts": 2, "mode": "standard"},
+        connect_timeout=2,
+        read_timeout=5,
+        # requests are only ever built from the validated platform config
+        parameter_validation=False,
+    )
+    session = await hass.async_add_executor_job(_create_session, aws_config)
+    exit_stack = AsyncExitStack()
+    rekognition_client = await exit_stack.enter_async_context(
+        session.client("rekognition", config=client_config)
+    )
+
+    async def _async_close_client(event):
+        await exit_stack.aclose()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_close_client)
 
     save_file_folder = config.get(CONF_SAVE_FILE_FOLDER)
+    writer_queue = None
     if save_file_folder:
+        # cv.isdir has already checked the folder exists, no per-frame check needed
         save_file_folder = Path(save_file_folder)
+        # A single background writer persists images for all cameras
+        writer_queue = asyncio.Queue(maxsize=WRITER_QUEUE_SIZE)
+        hass.async_create_background_task(
+            _async_image_writer(writer_queue), "amazon_rekognition image writer"
+        )
+
+    # Shared by all cameras, the Rekognition quota is per account and region
+    rate_limiter = _RateLimiter(config[CONF_TPS])
+
+    cv2 = None
+    if config[CONF_LOCAL_FACE_DETECTION]:
+        cv2 = await hass.async_add_executor_job(_import_opencv)
+        if cv2 is None:
+            _LOGGER.warning(
+                "Local face detection requires opencv-python-headless, every frame will be sent to AWS Rekognition"
+            )
 
     entities = []
     for camera in config[CONF_SOURCE]:
+        face_cascade = None
+        if cv2 is not None:
+            # one classifier per camera, entities run their detection concurrently
+            face_cascade = await hass.async_add_executor_job(_load_face_cascade, cv2)
+            if face_cascade is None:
+                _LOGGER.warning(
+                    "OpenCV's face detector could not be loaded, every frame will be sent to AWS Rekognition"
+                )
+                cv2 = None
         entities.append(
             FaceRecognitionEntity(
                 rekognition_client=rekognition_client,
+                rate_limiter=rate_limiter,
                 collection_id=config[CONF_COLLECTION_ID],
                 similarity=config[CONF_SIMILARITY],
                 save_file_format=config.get(CONF_SAVE_FILE_FORMAT),
@@ -115,12 +238,244 @@ def setup_platform(hass, config, add_devices, discovery_info=None):
                 save_timestamped_file=config.get(CONF_SAVE_TIMESTAMPED_FILE),
                 always_save_latest_file=config.get(CONF_ALWAYS_SAVE_LATEST_FILE),
                 show_boxes=config.get(CONF_SHOW_BOXES),
+                event_per_match=config[CONF_EVENT_PER_MATCH],
+                result_cache_ttl=config[CONF_RESULT_CACHE_TTL],
+                motion_threshold=config[CONF_MOTION_THRESHOLD],
+                target_height=config[CONF_TARGET_HEIGHT],
+                max_upload_edge=config[CONF_MAX_UPLOAD_EDGE],
+                face_cascade=face_cascade,
+                writer_queue=writer_queue,
                 camera_entity=camera.get(CONF_ENTITY_ID),
                 name=camera.get(CONF_NAME),
             )
         )
 
-    add_devices(entities)
+    async_add_entities(entities)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+
+def _average_hash(img: Image.Image) -> int:
+    """Return a 64-bit perceptual hash of the image (8×8 grayscale vs. mean)."""
+    pixels = np.asarray(img.convert("L").resize((8, 8), Image.BILINEAR))
+    return int.from_bytes(np.packbits(pixels > pixels.mean()).tobytes(), "big")
+
+
+def _create_session(aws_config: Dict[str, str]) -> aioboto3.Session:
+    """Create the AWS session, with the Rekognition service model already loaded.
+
+    Creating a client reads the service model and endpoint rules from disk,
+    loading them here keeps that file I/O out of the event loop.
+    """
+    botocore_session = get_session()
+    loader = botocore_session.get_component("data_loader")
+    # same arguments as botocore's client creator, so its loader cache hits
+    loader.load_service_model("rekognition", "service-2", api_version=None)
+    loader.load_service_model("rekognition", "endpoint-rule-set-1", api_version=None)
+    return aioboto3.Session(botocore_session=botocore_session, **aws_config)
+
+
+def _install_orjson_parser() -> None:
+    """Parse botocore JSON response bodies with orjson instead of json."""
+    try:
+        import orjson  # shipped with Home Assistant core
+        from botocore.parsers import BaseJSONParser
+    except ImportError:
+        return
+    if not hasattr(BaseJSONParser, "_parse_body_as_json"):
+        _LOGGER.debug("botocore JSON parser internals changed, keeping the default parser")
+        return
+
+    def _parse_body_as_json(self, body_contents):
+        if not body_contents:
+            return {}
+        try:
+            return orjson.loads(body_contents)
+        except orjson.JSONDecodeError:
+            # same fallback as botocore: expose the raw body as the message
+            return {"message": body_contents.decode(self.DEFAULT_ENCODING)}
+
+    BaseJSONParser._parse_body_as_json = _parse_body_as_json
+
+
+def _import_opencv():
+    """Return the cv2 module, None if OpenCV is not installed."""
+    try:
+        import cv2  # optional dependency, only needed for local face detection
+    except ImportError:
+        return None
+    return cv2
+
+
+def _load_face_cascade(cv2):
+    """Load OpenCV's frontal face Haar cascade, None if it cannot be loaded."""
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    if cascade.empty():
+        return None
+    return cascade
+
+
+def _dedupe_matches(rows: List[tuple]) -> List[tuple]:
+    """Keep only the most similar match row for each external_image_id."""
+    best: Dict[str, tuple] = {}
+    for row in rows:
+        ext_id, _, similarity, _ = row
+        if ext_id not in best or similarity > best[ext_id][2]:
+            best[ext_id] = row
+    return list(best.values())
+
+
+def _put_latest(queue: asyncio.Queue, item) -> None:
+    """Enqueue item, dropping the oldest queued entry when the queue is full."""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+
+async def _async_image_writer(queue: asyncio.Queue) -> None:
+    """Encode and write queued annotated images off the inference path."""
+    while True:
+        entity, image, matches, now = await queue.get()
+        try:
+            await entity._async_save_annotated_image(image, matches, now)
+        except Exception as e:
+            _LOGGER.error("'%s': Unexpected error while saving an image: %s", entity.entity_id, e)
+
+
+def _decode_scaled(img: Image.Image, max_edge: int, target_height: int) -> Image.Image:
+    """Decode an opened frame, shrunk to fit within max_edge × target_height."""
+    scale = min(max_edge / img.width, target_height / img.height)
+    if scale >= 1:
+        img.load()
+        return img
+    # Let libjpeg decode at a reduced DCT scale that still covers the target
+    img.draft("RGB", (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+    img = img.convert("RGB")
+    img.thumbnail((max_edge, target_height), Image.BILINEAR)
+    return img
+
+
+def _prepare_frame(
+    image_bytes: bytes,
+    max_edge: int,
+    target_height: int,
+    face_cascade=None,
+    keep_image: bool = True,
+) -> tuple[Image.Image | None, bytes, int, np.ndarray, bool | None]:
+    """Decode a frame, downscale it for upload and compute its fingerprints.
+
+    Frames taller than target_height (or wider than max_edge) are decoded
+    shrunk, keeping their aspect ratio, and re-encoded as 4:2:0 JPEG for
+    upload unless the payload is already below UPLOAD_REENCODE_MIN_BYTES.
+    When a face cascade is given, also report whether it finds any face.
+    Without keep_image, a frame that is uploaded as-is is only decoded at
+    fingerprint resolution and no image is returned.
+    """
+    # Everything is decoded inside the block, so the returned image does not
+    # keep the BytesIO (and with it the frame bytes) alive
+    with Image.open(io.BytesIO(image_bytes)) as img:  # parses the header only
+        upload_bytes = image_bytes
+        scale = min(max_edge / img.width, target_height / img.height)
+        reencode = scale < 1 and len(image_bytes) > UPLOAD_REENCODE_MIN_BYTES
+        fingerprint_only = not reencode and not keep_image and face_cascade is None
+        if fingerprint_only:
+            # Only the fingerprints are needed: decode at libjpeg's smallest DCT scale
+            img.draft("L", (64, 64))
+        else:
+            img = _decode_scaled(img, max_edge, target_height)
+        if reencode:
+            buf = io.BytesIO()
+            img.save(
+                buf,
+                format="JPEG",
+                quality=UPLOAD_JPEG_QUALITY,
+                subsampling="4:2:0",
+                progressive=False,
+            )
+            upload_bytes = buf.getvalue()
+        small = np.asarray(img.resize((64, 64)).convert("L"), dtype=np.int16)
+        has_face = None
+        if face_cascade is not None:
+            gray = np.asarray(img.convert("L"))
+            has_face = len(face_cascade.detectMultiScale(gray, 1.2, 5, minSize=(60, 60))) > 0
+        phash = _average_hash(img)
+    return None if fingerprint_only else img, upload_bytes, phash, small, has_face
+
+
+def _load_image(image_bytes: bytes, max_edge: int, target_height: int) -> Image.Image:
+    """Fully decode a frame at upload size, without keeping the encoded bytes alive."""
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        return _decode_scaled(img, max_edge, target_height)
+
+
+class _ResultCache:
+    """LRU cache of recognition results keyed by perceptual hash.
+
+    Entries expire ttl seconds after they were stored, lookups do not extend
+    their lifetime, so faces indexed into the collection later are picked up.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self._ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, int, tuple[list, ...]]] = OrderedDict()
+
+    def get(self, phash: int) -> tuple[int, tuple[list, ...]] | None:
+        """Return the (state, match columns) cached for an identical or near-identical frame."""
+        now = time.monotonic()
+        for expired in [h for h, (expires, _, _) in self._entries.items() if expires <= now]:
+            del self._entries[expired]
+        hit = phash
+        if hit not in self._entries:
+            # only results with matched faces are reused for merely similar frames
+            hit = next(
+                (
+                    cached_hash
+                    for cached_hash, (_, state, _) in self._entries.items()
+                    if state > 0 and (cached_hash ^ phash).bit_count() <= RESULT_CACHE_MAX_DISTANCE
+                ),
+                None,
+            )
+            if hit is None:
+                return None
+        self._entries.move_to_end(hit)
+        _, state, columns = self._entries[hit]
+        return state, columns
+
+    def put(self, phash: int, state: int, columns: tuple[list, ...]) -> None:
+        """Store the result for frames with this perceptual hash."""
+        self._entries[phash] = (time.monotonic() + self._ttl, state, columns)
+        self._entries.move_to_end(phash)
+        if len(self._entries) > RESULT_CACHE_SIZE:
+            self._entries.popitem(last=False)
+
+
+class _RateLimiter:
+    """Token bucket limiting Rekognition requests per second."""
+
+    def __init__(self, rate: float) -> None:
+        self._rate = rate
+        self._capacity = max(1.0, rate)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def acquire(self, max_wait: float) -> bool:
+        """Take a token, waiting up to max_wait seconds. Return False if none was free."""
+        # Reserve the token before sleeping: the balance goes negative, so later
+        # callers see the wait of everyone queued ahead of them
+        self._refill()
+        wait = max(0.0, (1 - self._tokens) / self._rate)
+        if wait > max_wait:
+            return False
+        self._tokens -= 1
+        if wait:
+            await asyncio.sleep(wait)
+        return True
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -129,9 +484,12 @@ def setup_platform(hass, config, add_devices, discovery_info=None):
 class FaceRecognitionEntity(ImageProcessingEntity):
     """Search a Rekognition collection for known faces."""
 
+    _font: ImageFont.ImageFont | None = None  # shared label font, loaded on first use
+
     def __init__(
         self,
         rekognition_client,
+        rate_limiter: _RateLimiter,
         collection_id: str,
         similarity: float,
         save_file_format: str | None,
@@ -139,6 +497,13 @@ class FaceRecognitionEntity(ImageProcessingEntity):
         save_timestamped_file: bool,
         always_save_latest_file: bool,
         show_boxes: bool,
+        event_per_match: bool,
+        result_cache_ttl: int,
+        motion_threshold: float,
+        target_height: int,
+        max_upload_edge: int,
+        face_cascade,
+        writer_queue: asyncio.Queue | None,
         camera_entity: str,
         name: str | None = None,
     ) -> None:
@@ -146,13 +511,32 @@ class FaceRecognitionEntity(ImageProcessingEntity):
         self._client = rekognition_client
         self._collection_id = collection_id
         self._similarity_threshold = similarity
+        self._rate_limiter = rate_limiter
+        self._search = rekognition_client.search_faces_by_image
+        self._search_params = {
+            "CollectionId": collection_id,
+            "FaceMatchThreshold": similarity,
+            "MaxFaces": 5,
+        }
         self._camera_entity = camera_entity
         self._name = name or f"rekognition_face_{split_entity_id(camera_entity)[1]}"
 
         # state & attrs
         self._state: int | None = None
-        self._matches: List[Dict[str, Any]] = []
+        # matches as parallel columns (see MATCH_FIELDS), dicts are built on demand
+        self._ext_ids: List[str] = []
+        self._face_ids: List[str | None] = []
+        self._similarities: List[float] = []
+        self._bboxes: List[Dict[str, float] | None] = []
         self._last_detection: str | None = None
+        self._event_per_match = event_per_match
+        self._now: datetime | None = None
+        self._motion_threshold = motion_threshold
+        self._prev_small: np.ndarray | None = None  # last frame whose result was applied
+        self._target_height = target_height
+        self._max_upload_edge = max_upload_edge
+        self._face_cascade = face_cascade
+        self._result_cache = _ResultCache(result_cache_ttl) if result_cache_ttl else None
 
         # image saving
         self._save_file_format = save_file_format
@@ -160,7 +544,15 @@ class FaceRecognitionEntity(ImageProcessingEntity):
         self._save_timestamped_file = save_timestamped_file
         self._always_save_latest_file = always_save_latest_file
         self._show_boxes = show_boxes
-        self._image = None
+        self._object_id: str | None = None  # set once the entity_id is known
+        self._latest_path: Path | None = None
+        self._image: Image.Image | None = None  # last decoded frame, reused for annotation
+        self._encode_buf = io.BytesIO()  # reused for every encoded snapshot
+
+        # capture → infer → (shared) writer pipeline
+        self._frame_q: asyncio.Queue[bytes] = asyncio.Queue(maxsize=FRAME_QUEUE_SIZE)
+        self._writer_q = writer_queue
+        self._infer_task: asyncio.Task | None = None
 
     # ───────── ImageProcessingEntity overrides ─────────
 
@@ -196,157 +588,300 @@ class FaceRecognitionEntity(ImageProcessingEntity):
             attrs["last_face_recognition"] = self._last_detection
         return attrs
 
+    @property
+    def _matches(self) -> List[Dict[str, Any]]:
+        """Matches of the last frame as a list of dicts."""
+        return [
+            dict(zip(MATCH_FIELDS, row))
+            for row in zip(self._ext_ids, self._face_ids, self._similarities, self._bboxes)
+        ]
+
+    def _set_matches(self, rows) -> None:
+        """Store match rows (ordered as MATCH_FIELDS) column-wise."""
+        columns = [list(column) for column in zip(*rows)] or [[], [], [], []]
+        self._ext_ids, self._face_ids, self._similarities, self._bboxes = columns
+
+    async def async_added_to_hass(self):
+        """Start the inference worker."""
+        await super().async_added_to_hass()
+        self._object_id = split_entity_id(self.entity_id)[1]
+        if self._save_file_folder:
+            self._latest_path = (
+                self._save_file_folder / f"{self._object_id}_latest.{self._save_file_format or 'jpg'}"
+            )
+        self._infer_task = self.hass.async_create_background_task(
+            self._infer_worker(), f"{self.entity_id} rekognition inference"
+        )
+
+    async def async_will_remove_from_hass(self):
+        """Stop the inference worker."""
+        if self._infer_task:
+            self._infer_task.cancel()
+            self._infer_task = None
+
     # ───────── Core logic ─────────
-    def process_image(self, image_bytes):
+    async def async_process_image(self, image_bytes):
+        """Hand the frame to the inference worker, replacing any frame still waiting."""
+        _put_latest(self._frame_q, image_bytes)
+
+    async def _infer_worker(self):
+        """Run queued frames through Rekognition."""
+        while True:
+            image_bytes = await self._frame_q.get()
+            try:
+                await self._async_infer(image_bytes)
+            except Exception as e:
+                _LOGGER.error("'%s': Unexpected error while processing a frame: %s", self.entity_id, e)
+
+    async def _async_infer(self, image_bytes):
         """Send frame to AWS Rekognition and process the response."""
+        self._now = dt_util.now()  # one clock read per frame, shared by events and file names
         try:
             try:
-                img_pil = Image.open(io.BytesIO(image_bytes))
-                self._image = img_pil
+                (
+                    self._image,
+                    upload_bytes,
+                    phash,
+                    small,
+                    has_face,
+                ) = await self.hass.async_add_executor_job(
+                    _prepare_frame,
+                    image_bytes,
+                    self._max_upload_edge,
+                    self._target_height,
+                    self._face_cascade,
+                    # frames are always saved here, otherwise only when faces match
+                    bool(self._save_file_folder and self._always_save_latest_file),
+                )
             except UnidentifiedImageError:
-                _LOGGER.error(f"'{self.entity_id}': The image could not be recognized.")
+                _LOGGER.error("'%s': The image could not be recognized.", self.entity_id)
                 self._image = None
                 return
             except Exception as e:
-                _LOGGER.error(f"'{self.entity_id}': Error opening image: {e}")
+                _LOGGER.error("'%s': Error opening image: %s", self.entity_id, e)
                 self._image = None
                 return
-            response = self._client.search_faces_by_image(
-                CollectionId=self._collection_id,
-                Image={"Bytes": image_bytes},
-                FaceMatchThreshold=self._similarity_threshold,
-                MaxFaces=5,
-            )
-            _LOGGER.debug(f"'{self.entity_id}': Call AWS Rekognition API successful. Response: {response}")
-
-            self._matches = []
-            for match in response.get("FaceMatches", []):
-                similarity = match.get("Similarity", 0.0)
-                face_data = match.get("Face", {}) 
-                ext_id = face_data.get("ExternalImageId", "unknown")
-                face_id = face_data.get("FaceId")
-                bounding_box = face_data.get("BoundingBox")
-                self._matches.append(
-                    {
-                        "external_image_id": ext_id,
-                        "face_id": face_id,
-                        "similarity": round(similarity, 2),
-                        "bounding_box": bounding_box
-                    }
-                )
-            self._state = len(self._matches)
-            if self._state > 0:
-                _LOGGER.info(f"'{self.entity_id}': Successfully matched {self._state} face(faces).")
+            if len(upload_bytes) > REKOGNITION_MAX_IMAGE_BYTES:
+                _LOGGER.error("'%s': The image is %s bytes, above the AWS Rekognition limit of %s bytes.", self.entity_id, len(upload_bytes), REKOGNITION_MAX_IMAGE_BYTES)
+                return
+            if (
+                self._motion_threshold
+                and self._prev_small is not None
+                and np.abs(small - self._prev_small).mean() < self._motion_threshold
+            ):
+                _LOGGER.debug("'%s': No motion since the last analysed frame, AWS Rekognition call skipped.", self.entity_id)
+                return
+            cached = self._result_cache.get(phash) if self._result_cache else None
+            if cached is not None:
+                self._state, columns = cached
+                self._ext_ids, self._face_ids, self._similarities, self._bboxes = columns
+                self._prev_small = small
+                _LOGGER.debug("'%s': Frame matches a cached result, AWS Rekognition call skipped.", self.entity_id)
+            elif has_face is False:
+                self._set_matches(())
+                self._state = 0
+                self._prev_small = small
+                _LOGGER.info("'%s': No faces detected locally, AWS Rekognition call skipped. State is 0.", self.entity_id)
+            elif not await self._rate_limiter.acquire(RATE_LIMIT_MAX_WAIT):
+                _LOGGER.debug("'%s': AWS Rekognition request rate limit reached, frame dropped and previous state kept.", self.entity_id)
+                return
             else:
-                _LOGGER.info(f"'{self.entity_id}': Faces from the collection are not matched (although faces may have been detected by AWS Rekognition in the image). State is 0.")
+                response = await self._search(
+                    Image={"Bytes": upload_bytes}, **self._search_params
+                )
+                _LOGGER.debug("'%s': Call AWS Rekognition API successful. Response: %s", self.entity_id, response)
+
+                rows = [
+                    (
+                        (face := match["Face"]).get("ExternalImageId", "unknown"),
+                        face.get("FaceId"),
+                        round(match.get("Similarity", 0.0), 2),
+                        face.get("BoundingBox"),
+                    )
+                    for match in response.get("FaceMatches") or ()
+                ]
+                # Several indexed views of one person can all match the searched face
+                self._set_matches(_dedupe_matches(rows))
+                self._state = len(self._ext_ids)
+                self._prev_small = small
+                self._cache_result(phash)
+                if self._state > 0:
+                    _LOGGER.info("'%s': Successfully matched %s face(faces).", self.entity_id, self._state)
+                else:
+                    _LOGGER.info("'%s': Faces from the collection are not matched (although faces may have been detected by AWS Rekognition in the image). State is 0.", self.entity_id)
 
         except self._client.exceptions.InvalidParameterException as e:
             error_message = str(e).lower()
             if "no faces in the image" in error_message or \
             "there are no faces in the image" in error_message:
                 _LOGGER.info(
-                    f"'{self.entity_id}': AWS Rekognition reported that there were no faces in the provided image. Setting state to 0. Error: {e}"
+                    "'%s': AWS Rekognition reported that there were no faces in the provided image. Setting state to 0. Error: %s", self.entity_id, e
                 )
-                self._matches = []
+                self._set_matches(())
                 self._state = 0
+                self._prev_small = small
+                self._cache_result(phash)
             else:
                 _LOGGER.error(
-                    f"'{self.entity_id}': AWS Rekognition InvalidParameterException during SearchFacesByImage: {e}"
+                    "'%s': AWS Rekognition InvalidParameterException during SearchFacesByImage: %s", self.entity_id, e
                 )
-                self._matches = [] 
-                self._state = 0 
+                self._set_matches(())
+                self._state = 0
         except Exception as e:
             _LOGGER.error(
-                f"'{self.entity_id}': Common error during AWS Rekognition SearchFacesByImage: {e}"
+                "'%s': Common error during AWS Rekognition SearchFacesByImage: %s", self.entity_id, e
             )
-            self._matches = []
+            self._set_matches(())
             self._state = 0
-        _LOGGER.debug(f"'{self.entity_id}': Internal state after processing an API call: {self._state}, Matches: {len(self._matches)}")
+        _LOGGER.debug("'%s': Internal state after processing an API call: %s, Matches: %s", self.entity_id, self._state, len(self._ext_ids))
 
         if self._state and self._state > 0:
-            self._last_detection = dt_util.now().isoformat()
-            for match_data in self._matches:
-                event_data = match_data.copy()
-                event_data["entity_id"] = self.entity_id
-                event_data["timestamp"] = self._last_detection
-                self.hass.bus.fire(EVENT_FACE_RECOGNISED, event_data)
-                _LOGGER.debug(f"'{self.entity_id}': Event generated {EVENT_FACE_RECOGNISED} with data: {event_data}")
+            self._last_detection = self._now.isoformat()
+            common = {"entity_id": self.entity_id, "timestamp": self._last_detection}
+            if self._event_per_match:
+                for match_data in self._matches:
+                    event_data = {**match_data, **common}
+                    self.hass.bus.async_fire(EVENT_FACE_RECOGNISED, event_data)
+                    _LOGGER.debug("'%s': Event generated %s with data: %s", self.entity_id, EVENT_FACE_RECOGNISED, event_data)
+            else:
+                event_data = {**common, "matches": self._matches}
+                self.hass.bus.async_fire(EVENT_FACES_RECOGNISED, event_data)
+                _LOGGER.debug("'%s': Event generated %s with data: %s", self.entity_id, EVENT_FACES_RECOGNISED, event_data)
         elif self._state == 0:
-            _LOGGER.info(f"'{self.entity_id}': The final state is 0. Event '{EVENT_FACE_RECOGNISED}' will not be generated.")
-
-        # Ensure that self._image was successfully set before attempting to save
-        if self._image and self._save_file_folder and (
-            (self._matches and len(self._matches) > 0) or self._always_save_latest_file
-        ):
-            self._save_annotated_image()
-            _LOGGER.debug(f"'{self.entity_id}': The process of saving the annotated image has started.")
-        elif not self._image and self._save_file_folder:
-            _LOGGER.warning(f"'{self.entity_id}': The process of saving the image was skipped because self._image is not set (possibly due to an error loading the image).")
-        _LOGGER.debug(f"'{self.entity_id}': Image processing complete.")
-        # ───────── Helpers ─────────
-
-    def _save_annotated_image(self):
+            _LOGGER.info("'%s': The final state is 0. No recognition event will be generated.", self.entity_id)
+        self.async_write_ha_state()
+
+        if self._save_file_folder and (self._ext_ids or self._always_save_latest_file):
+            if self._image is None:
+                # Only fingerprints were decoded, open the full frame now that it is saved
+                self._image = await self.hass.async_add_executor_job(
+                    _load_image, image_bytes, self._max_upload_edge, self._target_height
+                )
+            _put_latest(self._writer_q, (self, self._image, self._matches, self._now))
+            _LOGGER.debug("'%s': The annotated image has been queued for saving.", self.entity_id)
+        _LOGGER.debug("'%s': Image processing complete.", self.entity_id)
+
+    # ───────── Helpers ─────────
+
+    def _cache_result(self, phash: int):
+        """Remember the current result for frames with this perceptual hash."""
+        if self._result_cache is not None:
+            self._result_cache.put(
+                phash,
+                self._state,
+                (self._ext_ids, self._face_ids, self._similarities, self._bboxes),
+            )
+
+    async def _async_save_annotated_image(
+        self, image: Image.Image, matches: List[Dict[str, Any]], now: datetime
+    ):
         """Draw bounding boxes around recognised faces and save the image."""
-        if not self._image:
-            _LOGGER.debug(f"'{getattr(self, 'entity_id', self._name)}': _save_annotated_image aborted, self._image is None.")
+        if not image:
+            _LOGGER.debug("'%s': _async_save_annotated_image aborted, image is None.", getattr(self, 'entity_id', self._name))
             return
 
-        if not self.entity_id:
-            _LOGGER.error(f"'{self._name or 'UnknownRekognitionEntity'}': entity_id is not available, cannot save image because object_id cannot be derived.")
+        if not self._object_id:
+            _LOGGER.error("'%s': entity_id is not available, cannot save image because object_id cannot be derived.", self._name or 'UnknownRekognitionEntity')
             return
 
+        filename_timestamped = None
+        if matches and self._save_timestamped_file:
+            ts = now.strftime(DATETIME_FORMAT)
+            filename_timestamped = (
+                self._save_file_folder / f"{self._object_id}_{ts}.{self._save_file_format or 'jpg'}"
+            )
+        # Encode once, the timestamped file is a link to / copy of the latest one
+        await self.hass.async_add_executor_job(
+            self._save_image_files, image, matches, filename_timestamped
+        )
+
+    def _save_image_files(
+        self, image: Image.Image, matches: List[Dict[str, Any]], filename_timestamped: Path | None
+    ):
+        """Encode the frame into the reusable buffer and write it out."""
+        buf = self._encode_buf
+        buf.seek(0)
+        buf.truncate()
+        draw_boxes = bool(matches and self._show_boxes)
+        self._encode_annotated_image(image, matches, buf, draw_boxes)
+        # The view must be released before the buffer can be truncated again
+        with buf.getbuffer() as data:
+            self._write_image_files(data, self._latest_path, filename_timestamped)
+
+    def _write_image_files(self, data: memoryview, filename_latest: Path, filename_timestamped: Path | None):
+        """Write the latest image, then hardlink (or copy) it to the timestamped name."""
         try:
-            current_object_id = split_entity_id(self.entity_id)[1]
+            # Replace rather than overwrite, so earlier hardlinks keep their content
+            tmp_filename = filename_latest.with_name(f".{filename_latest.name}.tmp")
+            tmp_filename.write_bytes(data)
+            os.replace(tmp_filename, filename_latest)
+            _LOGGER.debug("'%s': Saved annotated image to %s", self.entity_id, filename_latest)
         except Exception as e:
-            _LOGGER.error(f"'{self.entity_id}': Error splitting entity_id to get object_id: {e}")
+            _LOGGER.error("'%s': Failed to save latest image to %s: %s", self.entity_id, filename_latest, e)
             return
 
-        img = self._image.convert("RGB")
-        draw = ImageDraw.Draw(img)
-
-        for match in self._matches:
-            bbox = match.get("bounding_box") or match.get("Face", {}).get("BoundingBox")
-            if not bbox or not self._show_boxes:
-                continue
-            img_width, img_height = img.size
-
-            y_min_rel = bbox["Top"]
-            x_min_rel = bbox["Left"]
-            y_max_rel = bbox["Top"] + bbox["Height"]
-            x_max_rel = bbox["Left"] + bbox["Width"]
-
-            draw_box(
-                draw,
-                (y_min_rel, x_min_rel, y_max_rel, x_max_rel),
-                img_width,
-                img_height,
-                text=f"{match['external_image_id']}: {match['similarity']:.1f}%",
-            )
-
-        if not self._save_file_folder.exists():
-            try:
-                self._save_file_folder.mkdir(parents=True, exist_ok=True)
-                _LOGGER.info(f"'{self.entity_id}': Created save folder: {self._save_file_folder}")
-            except Exception as e:
-                _LOGGER.error(f"'{self.entity_id}': Failed to create save folder {self._save_file_folder}: {e}")
-                return
-
-        filename_latest = (
-            self._save_file_folder / f"{current_object_id}_latest.{self._save_file_format or 'jpg'}"
-        )
+        if filename_timestamped is None:
+            return
         try:
-            img.save(filename_latest)
-            _LOGGER.debug(f"'{self.entity_id}': Saved annotated image to %s", filename_latest)
+            try:
+                os.link(filename_latest, filename_timestamped)
+            except OSError:
+                shutil.copyfile(filename_latest, filename_timestamped)
+            _LOGGER.info("'%s': Saved timestamped image to %s", self.entity_id, filename_timestamped)
         except Exception as e:
-            _LOGGER.error(f"'{self.entity_id}': Failed to save latest image to %s: %s", filename_latest, e)
+            _LOGGER.error("'%s': Failed to save timestamped image to %s: %s", self.entity_id, filename_timestamped, e)
 
-        if self._matches and self._save_timestamped_file:
-            ts = dt_util.now().strftime(DATETIME_FORMAT)
-            filename_timestamped = (
-                self._save_file_folder / f"{current_object_id}_{ts}.{self._save_file_format or 'jpg'}"
+    def _encode_annotated_image(
+        self,
+        image: Image.Image,
+        matches: List[Dict[str, Any]],
+        buf: io.BytesIO,
+        draw_boxes: bool,
+    ) -> None:
+        """Draw the face boxes and encode the frame into ``buf`` in the configured file format.
+
+        Without draw_boxes the frame is encoded straight through, with no box
+        geometry or ImageDraw set up.
+        """
+        if draw_boxes:
+            boxed = [match for match in matches if match.get("bounding_box")]
+            draw_boxes = bool(boxed)
+
+        # Boxes are drawn on a copy, the entity still holds on to the frame.
+        # Without boxes the frame is saved as is, unless JPEG/PNG can't store its mode
+        if draw_boxes:
+            img = image.copy() if image.mode == "RGB" else image.convert("RGB")
+        elif image.mode not in ("RGB", "L"):
+            img = image.convert("RGB")
+        else:
+            img = image
+
+        if draw_boxes:
+            # Relative (Left, Top, Width, Height) → absolute (x0, y0, x1, y1) in one go
+            boxes = np.array(
+                [
+                    [bbox["Left"], bbox["Top"], bbox["Width"], bbox["Height"]]
+                    for bbox in (match["bounding_box"] for match in boxed)
+                ]
             )
-            try:
-                img.save(filename_timestamped)
-                _LOGGER.info(f"'{self.entity_id}': Saved timestamped image to %s", filename_timestamped)
-            except Exception as e:
-                _LOGGER.error(f"'{self.entity_id}': Failed to save timestamped image to %s: %s", filename_timestamped, e)
+            boxes[:, 2:] += boxes[:, :2]
+            boxes = (boxes * (img.width, img.height, img.width, img.height)).astype(int)
+
+            if FaceRecognitionEntity._font is None:
+                FaceRecognitionEntity._font = ImageFont.load_default()
+            draw = ImageDraw.Draw(img)
+            for (x_min, y_min, x_max, y_max), match in zip(boxes.tolist(), boxed):
+                draw.line(
+                    [(x_min, y_min), (x_min, y_max), (x_max, y_max), (x_max, y_min), (x_min, y_min)],
+                    width=BOX_LINE_WIDTH,
+                    fill=BOX_COLOR,
+                )
+                draw.text(
+                    (x_min + BOX_LINE_WIDTH, abs(y_min - BOX_LINE_WIDTH - BOX_FONT_HEIGHT)),
+                    f"{match['external_image_id']}: {match['similarity']:.1f}%",
+                    fill=BOX_COLOR,
+                    font=FaceRecognitionEntity._font,
+                )
+
+        image_format, save_kwargs = SAVE_FORMATS[self._save_file_format or "jpg"]
+        img.save(buf, format=image_format, **save_kwargs)
@@ -0,0 +1,153 @@
+"""Tests for the image processing helpers of the Amazon Rekognition component."""
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+from botocore.parsers import BaseJSONParser
+from PIL import Image, ImageDraw
+
+from . import image_processing
+from .image_processing import (
+    FaceRecognitionEntity,
+    _average_hash,
+    _dedupe_matches,
+    _install_orjson_parser,
+    _RateLimiter,
+    _ResultCache,
+)
+
+
+MATCH_COLUMNS = (["person1"], ["xxx-xxx"], [98.4], [{"Width": 0.2, "Height": 0.3, "Left": 0.4, "Top": 0.1}])
+NO_MATCH_COLUMNS = ([], [], [], [])
+
+
+def _scene():
+    img = Image.new("L", (320, 240))
+    ImageDraw.Draw(img).rectangle((0, 0, 159, 239), fill=255)
+    return img
+
+
+def test_average_hash():
+    scene = _scene()
+    assert _average_hash(scene) == _average_hash(scene.copy())
+    assert _average_hash(scene) == _average_hash(scene.resize((640, 480)))
+    assert _average_hash(scene) == _average_hash(scene.convert("RGB"))
+    mirrored = scene.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+    assert (_average_hash(scene) ^ _average_hash(mirrored)).bit_count() == 64
+
+
+def test_result_cache_exact_hit():
+    cache = _ResultCache(ttl=60)
+    assert cache.get(0b1010) is None
+    cache.put(0b1010, 0, NO_MATCH_COLUMNS)
+    assert cache.get(0b1010) == (0, NO_MATCH_COLUMNS)
+
+
+def test_result_cache_near_hit_needs_matches():
+    cache = _ResultCache(ttl=60)
+    cache.put(0, 0, NO_MATCH_COLUMNS)
+    assert cache.get(0b11) is None
+    cache.put(1 << 40, 1, MATCH_COLUMNS)
+    assert cache.get((1 << 40) | 0b11) == (1, MATCH_COLUMNS)
+    assert cache.get((1 << 40) | 0b11111) is None
+
+
+def test_result_cache_expiry(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(image_processing.time, "monotonic", lambda: now)
+    cache = _ResultCache(ttl=10)
+    cache.put(1, 1, MATCH_COLUMNS)
+    now = 1009.0
+    assert cache.get(1) == (1, MATCH_COLUMNS)
+    # lookups do not extend the lifetime of an entry
+    now = 1010.0
+    assert cache.get(1) is None
+
+
+def test_result_cache_size():
+    cache = _ResultCache(ttl=60)
+    for phash in range(image_processing.RESULT_CACHE_SIZE + 1):
+        cache.put(phash << 8, 0, NO_MATCH_COLUMNS)
+    assert cache.get(0) is None
+    assert cache.get(1 << 8) == (0, NO_MATCH_COLUMNS)
+
+
+def test_rate_limiter_burst():
+    async def acquire_all():
+        limiter = _RateLimiter(5)
+        return [await limiter.acquire(max_wait=0) for _ in range(6)]
+
+    assert asyncio.run(acquire_all()) == [True] * 5 + [False]
+
+
+def test_rate_limiter_max_wait():
+    async def acquire_concurrently():
+        limiter = _RateLimiter(5)
+        return await asyncio.gather(*(limiter.acquire(max_wait=1.0) for _ in range(12)))
+
+    start = time.monotonic()
+    results = asyncio.run(acquire_concurrently())
+    # 5 tokens in the bucket plus 5 refilled within the second, none waits longer
+    assert results.count(True) == 10
+    assert time.monotonic() - start < 1.5
+
+
+def _write_image_files(data, filename_latest, filename_timestamped):
+    # only entity_id (for logging) is used from the entity
+    entity = SimpleNamespace(entity_id="image_processing.rekognition_face_test")
+    FaceRecognitionEntity._write_image_files(
+        entity, memoryview(data), filename_latest, filename_timestamped
+    )
+
+
+def test_write_image_files_keeps_timestamped_content(tmp_path):
+    latest = tmp_path / "cam_latest.jpg"
+    timestamped = tmp_path / "cam_2025-05-11_16.45.20.jpg"
+    _write_image_files(b"first", latest, timestamped)
+    assert timestamped.read_bytes() == b"first"
+    assert os.path.samefile(latest, timestamped)
+
+    _write_image_files(b"second", latest, None)
+    assert latest.read_bytes() == b"second"
+    # the latest file was replaced, not rewritten through the hardlink
+    assert timestamped.read_bytes() == b"first"
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_write_image_files_copies_over_existing_name(tmp_path):
+    latest = tmp_path / "cam_latest.jpg"
+    timestamped = tmp_path / "cam_2025-05-11_16.45.20.jpg"
+    timestamped.write_bytes(b"older frame of the same second")
+    _write_image_files(b"first", latest, timestamped)
+    assert latest.read_bytes() == b"first"
+    assert timestamped.read_bytes() == b"first"
+    assert not os.path.samefile(latest, timestamped)
+
+
+def test_dedupe_matches():
+    alice_1 = ("alice", "face-1", 91.0, {"Left": 0.1})
+    bob_1 = ("bob", "face-2", 95.0, {"Left": 0.5})
+    alice_2 = ("alice", "face-3", 97.5, {"Left": 0.1})
+    bob_2 = ("bob", "face-4", 95.0, {"Left": 0.5})
+    # one row per person, in order of first appearance, the first row wins a tie
+    assert _dedupe_matches([alice_1, bob_1, alice_2, bob_2]) == [alice_2, bob_1]
+    assert _dedupe_matches([bob_1, alice_1]) == [bob_1, alice_1]
+    assert _dedupe_matches([]) == []
+
+
+def test_orjson_parser(monkeypatch):
+    original = BaseJSONParser._parse_body_as_json
+    # the shim patches botocore process-wide, monkeypatch puts the original back
+    monkeypatch.setattr(BaseJSONParser, "_parse_body_as_json", original)
+    _install_orjson_parser()
+    assert BaseJSONParser._parse_body_as_json is not original
+
+    parser = BaseJSONParser()
+    assert parser._parse_body_as_json(b"") == {}
+    assert parser._parse_body_as_json(b'{"FaceMatches": [{"Similarity": 98.4}]}') == {
+        "FaceMatches": [{"Similarity": 98.4}]
+    }
+    assert parser._parse_body_as_json(b"<html>Bad Gateway</html>") == {
+        "message": "<html>Bad Gateway</html>"
+    }